@@ -3,10 +3,16 @@ import json
 import logging
 import requests
 import ssl
-from typing import Dict, List
+import socket
+import time
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 from urllib3.util.ssl_ import create_urllib3_context
-from tenacity import retry, stop_after_attempt, wait_exponential
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -33,6 +39,42 @@ except ImportError:
 except Exception as e:
     print(f"WARNING: Could not load .env file: {e}")
 
+# Optional: orjson parses JSON several times faster than the stdlib module
+# and accepts the raw response bytes directly. Fall back when not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _parse_json(response):
+    """Parse a response body, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+logger = logging.getLogger('BOBOProcessor')
+
+# Environment snapshot - the .env file is loaded above at import time, so
+# hot paths read these module constants instead of hitting os.environ
+_ATHOC_SERVER_URL = os.getenv("ATHOC_SERVER_URL")
+_ORG_CODE = os.getenv("ORG_CODE")
+_DISABLE_SSL_VERIFY = os.getenv("DISABLE_SSL_VERIFY", "false").lower() == "true"
+_ATTR_FIELDS = tuple(f for f in os.getenv("USER_ATTRIBUTES", "").split(",") if f)
+# Upper bound on concurrent batch requests; raise for large orgs if the
+# server tolerates it (keep at or below _POOL_MAXSIZE)
+_BATCH_WORKERS = int(os.getenv("ATHOC_BATCH_WORKERS", "16"))
+# Connection pool sizing - must be >= _BATCH_WORKERS or urllib3 discards
+# pooled connections mid-batch ("connection pool is full" warnings)
+_POOL_MAXSIZE = int(os.getenv("ATHOC_POOL_MAXSIZE", "32"))
+# Users per SyncByCommonNames request - very large bodies slow the server
+# down disproportionately, so oversized syncs are split into chunks
+_SYNC_CHUNK_SIZE = int(os.getenv("ATHOC_SYNC_CHUNK", "1000"))
+_HTTP_PROXY = os.getenv("HTTP_PROXY")
+_HTTPS_PROXY = os.getenv("HTTPS_PROXY")
+# Output key names ("attr1", "attr2", ...) are fixed by _ATTR_FIELDS, so
+# format them once here rather than per user per call
+_ATTR_KEYS = tuple(f"attr{i+1}" for i in range(len(_ATTR_FIELDS)))
+
 # Role mapping from CommonName to full Name
 ROLE_MAP = {
     "RORGADM": "Organization Admin",
@@ -53,19 +95,35 @@ ROLE_MAP = {
     "RGEOM": "Geofence Manager"
 }
 
+# Keep pooled connections alive so a whole batch reuses one TLS handshake;
+# TCP_KEEPIDLE/KEEPINTVL are not available on every platform (e.g. Windows).
+# TCP_NODELAY is pinned explicitly (urllib3's defaults set it too) so small
+# duty-status POSTs never stall on Nagle + delayed-ACK interaction.
+_KEEPALIVE_SOCKET_OPTIONS = [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+]
+if hasattr(socket, 'TCP_KEEPIDLE'):
+    _KEEPALIVE_SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30))
+if hasattr(socket, 'TCP_KEEPINTVL'):
+    _KEEPALIVE_SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10))
+
 class TLS12HttpAdapter(HTTPAdapter):
     """Transport adapter that enforces TLS 1.2"""
     def __init__(self, *args, **kwargs):
         self.ssl_context = create_urllib3_context(
             ssl_minimum_version=ssl.TLSVersion.TLSv1_2
         )
-        if os.getenv("DISABLE_SSL_VERIFY", "false").lower() == "true":
+        if _DISABLE_SSL_VERIFY:
             self.ssl_context.check_hostname = False
             self.ssl_context.verify_mode = ssl.CERT_NONE
         super().__init__(*args, **kwargs)
 
     def init_poolmanager(self, *args, **kwargs):
         kwargs['ssl_context'] = self.ssl_context
+        kwargs['socket_options'] = (
+            list(HTTPConnection.default_socket_options) + _KEEPALIVE_SOCKET_OPTIONS
+        )
         return super().init_poolmanager(*args, **kwargs)
 
     def proxy_manager_for(self, *args, **kwargs):
@@ -74,7 +132,11 @@ class TLS12HttpAdapter(HTTPAdapter):
 
 class AtHocClient:
     """Generic AtHoc API client for common operations"""
-    
+
+    # One pooled session shared by every client instance in the process, so
+    # repeated AtHocClient() constructions reuse warm TLS connections
+    _shared_session = None
+
     def __init__(self):
         # Remove role loading attempt - not needed for core functionality
         import logging
@@ -88,12 +150,31 @@ class AtHocClient:
             raise Exception("Failed to get AtHoc authentication token")
         logger.debug("AtHocClient initialized successfully")
             
-        self.headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-        self.base_url = os.getenv("ATHOC_SERVER_URL")
-        self.org_code = os.getenv("ORG_CODE")
+        # Auth lives on the session so every request picks it up without a
+        # per-call dict merge; self.headers stays as an alias for anything
+        # still reading it. Content-Type deliberately stays off the session:
+        # the OAuth token POST sends a form body, and requests only
+        # auto-labels a body when no Content-Type is merged in already - a
+        # session-wide application/json would mislabel every token renewal.
+        self.session.headers["Authorization"] = f"Bearer {self.token}"
+        self.headers = self.session.headers
+        self.base_url = _ATHOC_SERVER_URL
+        self.org_code = _ORG_CODE
+        # All v2 endpoints hang off the org root - build it once, and
+        # pre-join the search endpoint used by several query paths
+        self._org_url = f"{self.base_url}/api/v2/orgs/{self.org_code}"
+        self._users_search_url = self._org_url + "/users/search/basic"
+        # Per-instance cache so repeated lookups of the same operator
+        # (duplicate IDs across batches) cost a single fetch
+        self._operator_cache = {}
+        # Negative cache: login_id -> monotonic expiry. Unknown/external
+        # users would otherwise be re-fetched on every sync cycle.
+        self._missing_operators = {}
+        # Merged CommonName -> full Name table; API-loaded roles overlay the
+        # static ROLE_MAP so get_role_name is a single dict lookup. The API
+        # load is deferred until a name is actually requested.
+        self._merged_roles = dict(ROLE_MAP)
+        self._roles_loaded = False
 
     @staticmethod
     def format_datetime_for_athoc(dt: datetime) -> str:
@@ -104,44 +185,116 @@ class AtHocClient:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            self.session.close()
+        # The session (and its connection pool) is shared across instances;
+        # leave it open so later clients reuse the warm connections
+        pass
 
     def _create_session(self):
-        """Create a requests session with TLS 1.2 support"""
+        """Create a requests session with TLS 1.2 support
+
+        Transport note: concurrency comes from threading the batch helpers
+        over this session's keep-alive connection pool. HTTP/2 multiplexing
+        (httpx) was considered but ruled out - the offline Windows install
+        only ships the requests/urllib3 wheel set (see packages/), and the
+        proxy/TLS adapter stack below is built on urllib3. HTTP/1.1 does
+        serialize responses per socket, but the pool holds one socket per
+        in-flight worker, so nothing queues behind a slow response.
+        """
+        if AtHocClient._shared_session is not None:
+            return AtHocClient._shared_session
+
         session = requests.Session()
-        adapter = TLS12HttpAdapter()
+        # Larger pool so parallel batch lookups don't churn connections.
+        # Transient failures (connection resets, 429/5xx) retry with backoff
+        # at the adapter level; urllib3's default method allowlist excludes
+        # POST, so bulk syncs are never replayed.
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+        adapter = TLS12HttpAdapter(pool_connections=_POOL_MAXSIZE,
+                                   pool_maxsize=_POOL_MAXSIZE,
+                                   max_retries=retries)
         session.mount('https://', adapter)
+        session.headers["Connection"] = "keep-alive"
+        # Ask for compressed bodies explicitly - some deployments only gzip
+        # when requested, and user/alert pages shrink 5-10x on the wire
+        # (urllib3 decompresses transparently)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
         
         # Add proxy support
-        http_proxy = os.getenv("HTTP_PROXY")
-        https_proxy = os.getenv("HTTPS_PROXY")
-        
-        if http_proxy or https_proxy:
+        if _HTTP_PROXY or _HTTPS_PROXY:
             proxies = {}
-            if http_proxy:
-                proxies['http'] = http_proxy
-            if https_proxy:
-                proxies['https'] = https_proxy
+            if _HTTP_PROXY:
+                proxies['http'] = _HTTP_PROXY
+            if _HTTPS_PROXY:
+                proxies['https'] = _HTTPS_PROXY
             session.proxies.update(proxies)
             print(f"Using proxy configuration: {proxies}")
         
-        if os.getenv("DISABLE_SSL_VERIFY", "false").lower() == "true":
+        if _DISABLE_SSL_VERIFY:
             session.verify = False
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         
+        AtHocClient._shared_session = session
         return session
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    def _get_auth_token(self) -> str:
-        """Get authentication token from AtHoc"""
-        import logging
-        logger = logging.getLogger('BOBOProcessor')
-        logger.debug("Entering _get_auth_token()")
+    @staticmethod
+    def _token_cache_path() -> Path:
+        """Token cache lives in the home directory, like the encryption key"""
+        return Path.home() / '.athoc_token_cache.json'
+
+    def _load_cached_token(self, cache_key: str) -> str:
+        """Return a cached token for this credential set if still valid"""
+        cache_path = self._token_cache_path()
+        try:
+            if not cache_path.exists():
+                return None
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("cache_key") == cache_key and cached.get("expires_at", 0) > time.time():
+                self._token_expiry = cached["expires_at"]
+                return cached.get("access_token")
+        except Exception as e:
+            logger.debug("Could not read token cache: %s", e)
+        return None
+
+    def _save_cached_token(self, cache_key: str, access_token: str, expires_in: int):
+        """Persist token to disk so short-lived invocations skip the OAuth roundtrip"""
+        cache_path = self._token_cache_path()
+        self._token_expiry = time.time() + max(expires_in - 60, 0)
+        try:
+            # Write to a temp file and os.replace it in so a concurrent run
+            # never reads a half-written cache
+            tmp_path = cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "cache_key": cache_key,
+                    "access_token": access_token,
+                    # Refresh ~60s early so we never present an expired token
+                    "expires_at": self._token_expiry
+                }, f)
+            # Set restrictive permissions (Unix/Mac)
+            try:
+                os.chmod(tmp_path, 0o600)
+            except (AttributeError, OSError):
+                pass  # Windows doesn't support chmod - that's OK
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.debug("Could not write token cache: %s", e)
+
+    def _build_token_request(self):
+        """Validate credentials and build the token request once per client
+
+        Returns (token_url, post_body, cache_key); memoized so re-auths and
+        retries reuse the same validated request instead of re-reading and
+        re-validating the environment.
+        """
+        if getattr(self, "_token_request", None) is not None:
+            return self._token_request
+
         required_vars = {
             "ATHOC_SERVER_URL": os.getenv("ATHOC_SERVER_URL"),
             "CLIENT_ID": os.getenv("CLIENT_ID"),
@@ -150,12 +303,23 @@ class AtHocClient:
             "PASSWORD": os.getenv("PASSWORD"),
             "ORG_CODE": os.getenv("ORG_CODE")
         }
-        
+
         if missing_vars := [k for k, v in required_vars.items() if not v]:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-        
+
+        # Cache key covers the credential identity so a config change never
+        # serves a stale token
+        cache_key = hashlib.sha256(
+            "|".join([
+                required_vars["ATHOC_SERVER_URL"],
+                required_vars["CLIENT_ID"],
+                required_vars["USERNAME"],
+                required_vars["ORG_CODE"]
+            ]).encode()
+        ).hexdigest()
+
         token_url = f"{required_vars['ATHOC_SERVER_URL']}/AuthServices/Auth/connect/token"
-        
+
         data = {
             "grant_type": "password",
             "scope": os.getenv("SCOPE", ""),
@@ -166,112 +330,181 @@ class AtHocClient:
             "acr_values": f"tenant:{required_vars['ORG_CODE']}"
         }
 
-        response = self.session.post(token_url, data=data, timeout=30)
-        response.raise_for_status()
-        
-        token_info = response.json()
+        self._token_request = (token_url, data, cache_key)
+        return self._token_request
+
+    def _ensure_token(self):
+        """Refresh the bearer token in place if it is at/near expiry"""
+        if time.time() >= getattr(self, '_token_expiry', float('inf')):
+            logger.debug("Auth token expired - refreshing in place")
+            self.token = self._get_auth_token(force_refresh=True)
+            self.session.headers["Authorization"] = f"Bearer {self.token}"
+
+    def _get_auth_token(self, force_refresh: bool = False) -> str:
+        """Get authentication token from AtHoc, reusing a cached one when valid"""
+        logger.debug("Entering _get_auth_token()")
+        token_url, data, cache_key = self._build_token_request()
+
+        if not force_refresh:
+            if cached_token := self._load_cached_token(cache_key):
+                logger.debug("Exiting _get_auth_token() - using cached token")
+                return cached_token
+
+        # Minimal inline retry (3 attempts, 4s/8s backoff) around the network
+        # call only - config errors above shouldn't be retried
+        for attempt in range(1, 4):
+            try:
+                response = self.session.post(token_url, data=data, timeout=30)
+                response.raise_for_status()
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt == 3:
+                    raise
+                wait = min(4 * 2 ** (attempt - 1), 10)
+                logger.warning("Auth token request failed (attempt %d/3), retrying in %ds: %s",
+                               attempt, wait, e)
+                time.sleep(wait)
+
+        token_info = _parse_json(response)
         if access_token := token_info.get("access_token"):
+            self._save_cached_token(cache_key, access_token,
+                                    int(token_info.get("expires_in", 3600)))
             logger.debug("Exiting _get_auth_token() - success")
             return access_token
         logger.error("Auth token not found in response")
         raise ValueError("Auth token not found in response")
 
+    def iter_alerts(self, start_date: str, end_date: str, page_size: int = 1000):
+        """Page through alerts lazily, yielding them with bounded memory
+
+        Memory is bounded by page_size: each page is parsed whole (an
+        incremental parser like ijson isn't in the vendored wheel set),
+        so lower page_size if alert payloads ever grow past comfort.
+        """
+        url = f"{self._org_url}/alerts"
+
+        offset = 0
+        while True:
+            params = {
+                "StartDate": start_date,
+                "EndDate": end_date,
+                "AlertStatus": "live,ended",
+                "Limit": page_size,
+                "Offset": offset,
+                "IncludeSubOrgs": True
+            }
+
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            data = _parse_json(response).get("Data", [])
+
+            yield from data
+
+            # A short page means we've reached the end of the window
+            if len(data) < page_size:
+                break
+            offset += page_size
+
     def get_alerts(self, start_date: str, end_date: str) -> List[Dict]:
-        """Generic alert retrieval"""
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/alerts"
-        
-        params = {
-            "StartDate": start_date,
-            "EndDate": end_date,
-            "AlertStatus": "live,ended",
-            "Limit": 1000,
-            "Offset": 0,
-            "IncludeSubOrgs": True
-        }
-        
-        response = self.session.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        return response.json().get("Data", [])
+        """Generic alert retrieval - materializes the full paged window"""
+        return list(self.iter_alerts(start_date, end_date))
 
     def get_device_summary(self, alert_id: str) -> List[Dict]:
         """Generic device summary"""
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/alerts/{alert_id}/reports/devicesummary"
+        url = f"{self._org_url}/alerts/{alert_id}/reports/devicesummary"
         
-        response = self.session.get(url, headers=self.headers)
+        response = self.session.get(url)
         response.raise_for_status()
-        return response.json()
+        return _parse_json(response)
 
     def get_user_attributes(self, usernames: List[str]) -> Dict[str, Dict]:
         """Generic user attributes retrieval"""
         if not usernames:
             return {}
             
-        # Debug information about USER_ATTRIBUTES
-        attr_fields_raw = os.getenv("USER_ATTRIBUTES", "")
-        print(f"DEBUG: USER_ATTRIBUTES env value: '{attr_fields_raw}'")
-        
-        attr_fields = attr_fields_raw.split(",")
-        if not attr_fields or not attr_fields[0]:
-            print("DEBUG: No valid user attributes found in environment variables")
+        attr_fields = _ATTR_FIELDS
+        if not attr_fields:
+            logger.debug("No valid user attributes found in environment variables")
             return {}
-            
-        print(f"DEBUG: Using user attributes: {attr_fields}")
-            
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/users/search/basic"
-        
-        criteria = " or ".join([f"LOGIN_ID eq '{username}'" for username in usernames])
-        fields = ["LOGIN_ID"] + attr_fields
-        
-        params = {
-            "Criteria": f"({criteria})",
-            "Fields": ",".join(fields),
-            "limit": len(usernames)
-        }
-        
-        try:
-            response = self.session.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            users = response.json().get("Users", [])
-            result = {
-                user["LOGIN_ID"]: {
-                    f"attr{i+1}": user.get(field, "")
-                    for i, field in enumerate(attr_fields)
-                }
-                for user in users
+
+        logger.debug("Using user attributes: %s", attr_fields)
+
+
+        url = self._users_search_url
+        fields = ",".join(["LOGIN_ID"] + list(attr_fields))
+
+        def fetch_chunk(chunk: List[str]) -> List[Dict]:
+            # Single "in" filter - far cheaper for the server to parse than
+            # an O(N) chain of "LOGIN_ID eq ... or ..." clauses
+            params = {
+                "Criteria": "LOGIN_ID in (" + ",".join(f"'{username}'" for username in chunk) + ")",
+                "Fields": fields,
+                "limit": len(chunk)
             }
-            
-            # Debug output of what we found
-            if users:
-                print(f"DEBUG: Found {len(users)} users with attributes")
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            return _parse_json(response).get("Users", [])
+
+        # Bound each query to 200 IDs so large batches can't overflow URL
+        # limits; multiple chunks are fetched concurrently
+        chunks = [usernames[i:i + 200] for i in range(0, len(usernames), 200)]
+
+        try:
+            if len(chunks) == 1:
+                users = fetch_chunk(chunks[0])
+            else:
+                users = []
+                with ThreadPoolExecutor(max_workers=min(_BATCH_WORKERS, len(chunks))) as executor:
+                    for chunk_users in executor.map(fetch_chunk, chunks):
+                        users.extend(chunk_users)
+
+            # Single pass: build the attribute dicts and the found-id set
+            # together instead of re-walking users for the debug diff
+            result = {}
+            found_users = set()
+            for user in users:
+                login_id = user["LOGIN_ID"]
+                found_users.add(login_id)
+                result[login_id] = dict(zip(_ATTR_KEYS, (user.get(field, "") for field in attr_fields)))
+            
+            # Debug output of what we found - gated so the list builds are
+            # skipped entirely when debug logging is off
+            if users and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found %d users with attributes", len(users))
                 for user in users[:2]:  # Just show first 2 users to avoid too much output
-                    print(f"DEBUG: User {user.get('LOGIN_ID')} attributes: {[user.get(field, '') for field in attr_fields]}")
-            
+                    logger.debug("User %s attributes: %s", user.get('LOGIN_ID'),
+                                 [user.get(field, '') for field in attr_fields])
+
             # Note any users not found
-            found_users = {user["LOGIN_ID"] for user in users}
-            missing_users = set(usernames) - found_users
-            if missing_users:
-                print(f"DEBUG: {len(missing_users)} users not found in user attributes query: {', '.join(sorted(missing_users))}")
-                
+            if logger.isEnabledFor(logging.DEBUG):
+                missing_users = frozenset(usernames) - found_users
+                if missing_users:
+                    logger.debug("%d users not found in user attributes query: %s",
+                                 len(missing_users), ', '.join(sorted(missing_users)))
+
             return result
-            
+
         except requests.exceptions.RequestException as e:
-            print(f"WARNING: Error fetching user attributes: {str(e)}")
+            logger.warning("Error fetching user attributes: %s", e)
             return {}
 
     def get_all_users_with_attributes(self, fields: List[str] = None) -> Dict[str, Dict]:
-        """Generic user retrieval with attributes"""
+        """Generic user retrieval with attributes
+
+        Each 1000-user page is parsed whole; incremental parsing (ijson
+        over response.raw) would shave peak memory further but isn't in
+        the vendored wheel set, and the page cap already bounds it.
+        """
         # Use provided fields or fall back to environment configuration
         if fields is None:
-            attr_fields_raw = os.getenv("USER_ATTRIBUTES", "")
-            if not attr_fields_raw:
-                print("WARNING: No USER_ATTRIBUTES configured and no fields provided")
+            if not _ATTR_FIELDS:
+                logger.warning("No USER_ATTRIBUTES configured and no fields provided")
                 return {}
-            fields = [field.strip() for field in attr_fields_raw.split(",") if field.strip()]
-        
-        print(f"DEBUG: Retrieving all users with fields: {fields}")
+            fields = [field.strip() for field in _ATTR_FIELDS if field.strip()]
+
+        logger.debug("Retrieving all users with fields: %s", fields)
         
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/users/search/basic"
+        url = self._users_search_url
         
         # Include LOGIN_ID in fields if not already present
         all_fields = ["LOGIN_ID"] + [field for field in fields if field != "LOGIN_ID"]
@@ -288,16 +521,19 @@ class AtHocClient:
         
         try:
             while True:
-                params["Offset"] = page_number
-                response = self.session.get(url, headers=self.headers, params=params)
+                # Offset is a record offset, not a page index - passing the
+                # raw page number re-fetched overlapping rows on every page
+                params["Offset"] = page_number * 1000
+                response = self.session.get(url, params=params)
                 response.raise_for_status()
-                
-                data = response.json()
+
+                data = _parse_json(response)
                 users = data.get("Users", [])
                 total_users = data.get("TotalUsers", 0)
                 fetched_records = data.get("FetchedRecords", len(users))
-                
-                print(f"DEBUG: Fetched {fetched_records} users (page: {page_number}, offset: {page_number}, total: {total_users})")
+
+                logger.debug("Fetched %d users (page: %d, offset: %d, total: %d)",
+                             fetched_records, page_number, page_number * 1000, total_users)
                 
                 # Process users from this batch
                 for user in users:
@@ -318,23 +554,23 @@ class AtHocClient:
                 # Move to next page
                 page_number += 1
             
-            print(f"DEBUG: Successfully retrieved {len(all_users)} users with attributes")
-            
+            logger.debug("Successfully retrieved %d users with attributes", len(all_users))
+
             # Show sample of retrieved data
-            if all_users:
+            if all_users and logger.isEnabledFor(logging.DEBUG):
                 sample_user = next(iter(all_users.values()))
-                print(f"DEBUG: Sample user data: {sample_user}")
-            
+                logger.debug("Sample user data: %s", sample_user)
+
             return all_users
-            
+
         except requests.exceptions.RequestException as e:
-            print(f"ERROR: Failed to retrieve users with attributes: {str(e)}")
+            logger.error("Failed to retrieve users with attributes: %s", e)
             if hasattr(e, 'response') and e.response is not None:
                 try:
                     error_details = e.response.json()
-                    print(f"ERROR details: {error_details}")
+                    logger.error("Error details: %s", error_details)
                 except:
-                    print(f"ERROR response text: {e.response.text}")
+                    logger.error("Error response text: %s", e.response.text)
             return {}
 
     def get_operator_roles(self, login_id: str) -> Dict:
@@ -346,53 +582,79 @@ class AtHocClient:
         Returns:
             Dictionary containing operator's role information and permissions
         """
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/operators/{login_id}"
-        
+        if login_id in self._operator_cache:
+            return self._operator_cache[login_id]
+
+        # Skip lookups the API already said don't exist (TTL'd)
+        if self._missing_operators.get(login_id, 0) > time.monotonic():
+            return {}
+
+        url = f"{self._org_url}/operators/{login_id}"
+
         try:
-            response = self.session.get(url, headers=self.headers)
+            response = self.session.get(url)
             # Some APIs return 404 if the user is not found in the organization
             if response.status_code == 404:
-                print(f"DEBUG: Operator {login_id} not found in organization (404)")
+                logger.debug("Operator %s not found in organization (404)", login_id)
+                self._missing_operators[login_id] = time.monotonic() + 3600
                 return {}
-                
+
             response.raise_for_status()
-            return response.json()
+            operator_data = _parse_json(response)
+            self._operator_cache[login_id] = operator_data
+            return operator_data
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 403:
                 # This might be due to permissions or an external user
-                print(f"DEBUG: Cannot access operator info for {login_id}: Permission denied (403)")
+                logger.debug("Cannot access operator info for %s: Permission denied (403)", login_id)
+                self._missing_operators[login_id] = time.monotonic() + 3600
             else:
-                print(f"WARNING: HTTP error fetching operator roles for {login_id}: {str(e)}")
+                logger.warning("HTTP error fetching operator roles for %s: %s", login_id, e)
             return {}
         except requests.exceptions.RequestException as e:
-            print(f"WARNING: Error fetching operator roles for {login_id}: {str(e)}")
+            logger.warning("Error fetching operator roles for %s: %s", login_id, e)
             return {}
             
     def get_roles(self) -> List[Dict]:
         """Get all roles from the API"""
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/roles"  # Fixed endpoint
+        url = f"{self._org_url}/roles"  # Fixed endpoint
         
         try:
-            response = self.session.get(url, headers=self.headers)
+            response = self.session.get(url)
             response.raise_for_status()
-            roles = response.json()
+            roles = _parse_json(response)
             print(f"INFO: Successfully loaded {len(roles)} roles from API")
             return roles
         except Exception as e:
             print(f"WARNING: Error fetching roles: {str(e)}")
             return []
     
+    def load_roles(self):
+        """Load API role names into the merged lookup table
+
+        Updates the existing dict in place rather than rebuilding/merging a
+        fresh copy, so repeated loads don't churn allocations and the static
+        ROLE_MAP entries stay available as the fallback.
+        """
+        for role in self.get_roles():
+            common_name = role.get("CommonName")
+            name = role.get("Name")
+            if common_name and name:
+                self._merged_roles[common_name] = name
+        self._roles_loaded = True
+
     def get_role_name(self, common_name: str) -> str:
         """Convert a role CommonName to its full Name"""
         if not common_name:
             return "Unknown Role"
-            
-        # First check our API-loaded mapping
-        if common_name in self.roles_by_common_name:
-            return self.roles_by_common_name[common_name]
-            
-        # Fall back to the static mapping
-        return ROLE_MAP.get(common_name, common_name)
+
+        # Load API role names on first use - runs that never resolve a role
+        # name skip the /roles roundtrip entirely
+        if not self._roles_loaded:
+            self.load_roles()
+
+        # API-loaded names and the static fallback live in one merged dict
+        return self._merged_roles.get(common_name, common_name)
 
     def get_operator_roles_batch(self, login_ids: List[str]) -> Dict[str, Dict]:
         """Get operator roles for a list of users
@@ -402,25 +664,55 @@ class AtHocClient:
             
         Returns:
             Dictionary mapping login IDs to their operator role information
+
+        Note: a server-side batch endpoint (POST /operators/search) would
+        collapse this to one request, but the deployments we target only
+        expose per-id GET /operators/{login_id} - role membership is not
+        returned by the users search API, and /users/search/basic rejects
+        Orgs/Roles in its Fields projection. Hence the concurrent fan-out;
+        the cache and negative cache above keep repeat cycles cheap.
         """
         if not login_ids:
             return {}
-            
+
+        # Dedupe while keeping order - duplicate IDs (common when joining
+        # alert-target tables) would otherwise cost duplicate HTTP GETs
+        unique_ids = list(dict.fromkeys(login_ids))
+
+        # Fetch in parallel - the per-operator GETs are independent and I/O-bound.
+        # Per-future error handling so one bad lookup can't poison the batch.
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(_BATCH_WORKERS, len(unique_ids))) as executor:
+            futures = {executor.submit(self.get_operator_roles, login_id): login_id
+                       for login_id in unique_ids}
+            for future in as_completed(futures):
+                login_id = futures[future]
+                try:
+                    results[login_id] = future.result()
+                except Exception as e:
+                    logger.warning("Operator lookup failed for %s: %s", login_id, e)
+                    results[login_id] = {}
+
+        # Load role names once and bind the lookup before the tight loop -
+        # get_role_name would re-check the loaded flag per role
+        if not self._roles_loaded:
+            self.load_roles()
+        _role_name = self._merged_roles.get
+
         operator_roles = {}
-        for login_id in login_ids:
-            operator_data = self.get_operator_roles(login_id)
+        for login_id, operator_data in ((lid, results[lid]) for lid in unique_ids):
             if operator_data:
                 # Extract roles from the first org (typically the home org)
                 roles = []
                 role_names = []
-                
+
                 if "Orgs" in operator_data and operator_data["Orgs"]:
                     for org in operator_data["Orgs"]:
                         if org.get("OrgCode") == self.org_code:
                             common_roles = org.get("Roles", [])
                             roles = common_roles
                             # Convert CommonNames to full role names
-                            role_names = [self.get_role_name(role) for role in common_roles]
+                            role_names = [_role_name(role, role) for role in common_roles]
                             break
                         
                 operator_roles[login_id] = {
@@ -443,7 +735,7 @@ class AtHocClient:
         if not users_data:
             return []
             
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/users/SyncByCommonNames"
+        url = f"{self._org_url}/users/SyncByCommonNames"
         
         params = {
             "syncExistingUsersOnly": sync_existing_only,
@@ -451,62 +743,80 @@ class AtHocClient:
             "sourceIdentifier": source_identifier
         }
         
-        try:
-            response = self.session.post(
-                url, 
-                headers=self.headers, 
-                json=users_data,
-                params=params,
-                timeout=120  # Longer timeout for bulk operations
-            )
-            response.raise_for_status()
-            
-            results = response.json()
-            
-            # Debug logging: Log full JSON response when debug level is enabled
-            debug_mode = os.getenv('LOG_LEVEL', 'INFO').upper() == 'DEBUG'
-            if debug_mode:
-                print(f"DEBUG: AtHoc sync_users_by_common_names JSON response: {json.dumps(results, indent=2)}")
-                # Also try to use logger if available
-                try:
-                    import logging
-                    logger = logging.getLogger('BOBOProcessor')
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"AtHoc sync_users_by_common_names JSON response: {json.dumps(results, indent=2)}")
-                except:
-                    pass
-            
-            # Log summary of results
-            success_count = sum(1 for r in results if r.get(":SyncStatus") == "OK")
-            error_count = sum(1 for r in results if r.get(":SyncStatus") == "Error")
-            partial_count = sum(1 for r in results if r.get(":SyncStatus") == "Partial")
-            
-            print(f"User sync results: {success_count} success, {error_count} errors, {partial_count} partial")
-            
-            # Log any errors for debugging
-            for result in results:
-                if result.get(":SyncStatus") in ["Error", "Partial"]:
-                    login_id = result.get("LOGIN_ID", "Unknown")
-                    details = result.get(":SyncDetails", "No details")
-                    sync_status = result.get(":SyncStatus")
-                    
-                    # Distinguish between expected and unexpected errors
-                    if sync_status == "Error" and "does not exists in the Organization" in details:
-                        print(f"Expected: User {login_id} not found in AtHoc (will be treated as success)")
-                    else:
-                        print(f"Sync issue for {login_id}: {sync_status} - {details}")
-            
-            return results
-            
-        except requests.exceptions.RequestException as e:
-            print(f"ERROR: User sync request failed: {str(e)}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_details = e.response.json()
-                    print(f"ERROR details: {error_details}")
-                except:
-                    print(f"ERROR response text: {e.response.text}")
-            raise
+        def post_chunk(chunk):
+            try:
+                # Serialize the body with orjson when available - markedly
+                # faster than the json.dumps path requests takes for json=.
+                # Raw bytes need their content type spelled out per request
+                if orjson is not None:
+                    body = {"data": orjson.dumps(chunk),
+                            "headers": {"Content-Type": "application/json"}}
+                else:
+                    body = {"json": chunk}
+                response = self.session.post(
+                    url,
+                    params=params,
+                    timeout=120,  # Longer timeout for bulk operations
+                    **body
+                )
+                response.raise_for_status()
+                return _parse_json(response)
+            except requests.exceptions.RequestException as e:
+                print(f"ERROR: User sync request failed: {str(e)}")
+                if hasattr(e, 'response') and e.response is not None:
+                    try:
+                        error_details = e.response.json()
+                        print(f"ERROR details: {error_details}")
+                    except:
+                        print(f"ERROR response text: {e.response.text}")
+                raise
+
+        # Split oversized syncs so no single request body gets unwieldy; the
+        # chunks are independent user lists, so they can go out in parallel
+        chunks = [users_data[i:i + _SYNC_CHUNK_SIZE]
+                  for i in range(0, len(users_data), _SYNC_CHUNK_SIZE)]
+        if len(chunks) == 1:
+            results = post_chunk(chunks[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as executor:
+                results = []
+                for chunk_results in executor.map(post_chunk, chunks):
+                    results.extend(chunk_results)
+
+        # Debug logging: dump the full JSON response only when the debug
+        # level is enabled - serializing a large sync result is costly
+        if logger.isEnabledFor(logging.DEBUG):
+            if orjson is not None:
+                dump = orjson.dumps(results, option=orjson.OPT_INDENT_2).decode()
+            else:
+                dump = json.dumps(results, indent=2)
+            logger.debug("AtHoc sync_users_by_common_names JSON response: %s", dump)
+
+
+        # Tally statuses and collect issues in a single pass over results
+        status_counts = Counter()
+        issues = []
+        for result in results:
+            sync_status = result.get(":SyncStatus")
+            status_counts[sync_status] += 1
+            if sync_status in ("Error", "Partial"):
+                issues.append(result)
+
+        print(f"User sync results: {status_counts['OK']} success, {status_counts['Error']} errors, {status_counts['Partial']} partial")
+
+        # Log any errors for debugging
+        for result in issues:
+            login_id = result.get("LOGIN_ID", "Unknown")
+            details = result.get(":SyncDetails", "No details")
+            sync_status = result.get(":SyncStatus")
+
+            # Distinguish between expected and unexpected errors
+            if sync_status == "Error" and "does not exists in the Organization" in details:
+                print(f"Expected: User {login_id} not found in AtHoc (will be treated as success)")
+            else:
+                print(f"Sync issue for {login_id}: {sync_status} - {details}")
+
+        return results
 
 # todo: this code should not be in the file, it should be in the bobo_processor.py file
     def update_user_duty_status(self, username: str, duty_datetime: str = None, 
@@ -547,75 +857,66 @@ class AtHocClient:
             return False
     
 # todo: this code should not be in the file, it should be in the bobo_processor.py file
-    def batch_update_duty_status(self, duty_updates: List[Dict], 
+    def batch_update_duty_status(self, duty_updates: List[Tuple[str, Optional[datetime]]],
                                duty_status_field: str = "DUTY_STATUS") -> Dict[str, bool]:
         """Batch update multiple users' duty status
-        
+
         Args:
-            duty_updates: List of dicts with 'username' and 'duty_datetime' keys
+            duty_updates: List of (username, duty datetime) tuples; a None
+                datetime clears the field (off-duty)
             duty_status_field: Common name of the duty status field in AtHoc
-            
+
         Returns:
             Dictionary mapping usernames to success/failure status
         """
         if not duty_updates:
             return {}
-        
-        # Prepare user data for sync
-        users_data = []
-        for update in duty_updates:
-            username = update.get("username")
-            duty_datetime = update.get("datetime")
-            
-            if not username:
-                continue
-            
+
+        def format_duty(value) -> str:
             # Format datetime for AtHoc (DD/MM/YYYY HH:MM:SS format)
-            if duty_datetime:
-                if isinstance(duty_datetime, datetime):
-                    formatted_datetime = duty_datetime.strftime("%d/%m/%Y %H:%M:%S")
-                else:
-                    formatted_datetime = str(duty_datetime)
-            else:
-                formatted_datetime = ""
-                
-            user_data = {
-                "LOGIN_ID": username,
-                duty_status_field: formatted_datetime
-            }
-            users_data.append(user_data)
-        
+            if not value:
+                return ""
+            if isinstance(value, datetime):
+                return value.strftime("%d/%m/%Y %H:%M:%S")
+            return str(value)
+
+        # Prepare user data for sync in a single comprehension
+        users_data = [
+            {"LOGIN_ID": username,
+             duty_status_field: format_duty(duty_datetime)}
+            for username, duty_datetime in duty_updates if username
+        ]
+
         # Perform batch sync
         try:
             results = self.sync_users_by_common_names(users_data)
-            
-            # Map results back to usernames
-            status_map = {}
-            for result in results:
-                username = result.get("LOGIN_ID")
-                sync_status = result.get(":SyncStatus")
-                sync_details = result.get(":SyncDetails", "")
-                
-                # Consider it successful if:
-                # 1. Sync status is "OK" (normal success)
-                # 2. Sync status is "Error" but it's because user doesn't exist (expected behavior)
-                is_success = (
-                    sync_status == "OK" or 
-                    (sync_status == "Error" and "does not exists in the Organization" in sync_details)
+
+            # Map results back to usernames in one pass. Success means:
+            # 1. Sync status is "OK" (normal success)
+            # 2. Sync status is "Error" but it's because user doesn't exist (expected behavior)
+            status_map = {
+                result.get("LOGIN_ID"): (
+                    result.get(":SyncStatus") == "OK"
+                    or (result.get(":SyncStatus") == "Error"
+                        and "does not exists in the Organization" in result.get(":SyncDetails", ""))
                 )
-                
-                status_map[username] = is_success
-                
-                # Log the decision for debugging
-                if sync_status == "Error" and "does not exists in the Organization" in sync_details:
-                    print(f"DEBUG: Treating 'user does not exist' as success for {username}")
-            
+                for result in results
+            }
+
+            # Log the treated-as-success decisions for debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                for result in results:
+                    if (result.get(":SyncStatus") == "Error"
+                            and "does not exists in the Organization" in result.get(":SyncDetails", "")):
+                        logger.debug("Treating 'user does not exist' as success for %s",
+                                     result.get("LOGIN_ID"))
+
             return status_map
             
         except Exception as e:
             print(f"Batch duty status update failed: {str(e)}")
             # Return all failed
-            return {update.get("username"): False for update in duty_updates if update.get("username")}
+            return {username: False for username, _ in duty_updates if username}
 
 
 # todo: this code should not be in the file, it should be in the bobo_processor.py file
@@ -637,7 +938,7 @@ class AtHocClient:
         print(f"DEBUG: Looking for users with {duty_status_field} older than {cutoff_formatted}")
         
         # Use the existing user search API to find users with old duty status
-        url = f"{self.base_url}/api/v2/orgs/{self.org_code}/users/search/basic"
+        url = self._users_search_url
         
         # Search criteria: duty status field is present AND is older than cutoff
         # AtHoc query syntax: field pr (present) and field lt 'datetime'
@@ -650,10 +951,10 @@ class AtHocClient:
         }
         
         try:
-            response = self.session.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            users = response.json().get("Users", [])
+            users = _parse_json(response).get("Users", [])
             usernames = [user["LOGIN_ID"] for user in users if user.get("LOGIN_ID")]
             
             print(f"Found {len(usernames)} users with duty status older than {hours_threshold} hours")
@@ -694,4 +995,20 @@ class AtHocClient:
         success_count = sum(1 for success in results.values() if success)
         
         print(f"Auto-cleanup: Cleared duty status for {success_count}/{len(old_duty_users)} users")
-        return success_count 
\ No newline at end of file
+        return success_count 
+
+_client_singleton = None
+
+def get_client() -> AtHocClient:
+    """Return a process-wide AtHocClient, creating it on first use
+
+    Repeated calls reuse the same client (and its pooled session and
+    cached token); the bearer token is refreshed in place when it has
+    expired rather than re-running the full OAuth exchange per caller.
+    """
+    global _client_singleton
+    if _client_singleton is None:
+        _client_singleton = AtHocClient()
+    else:
+        _client_singleton._ensure_token()
+    return _client_singleton
@@ -4,19 +4,25 @@ Simple HTTP Proxy Server for Testing
 Creates a basic HTTP/HTTPS proxy server for testing proxy connectivity
 """
 
+import os
 import socket
 import threading
 import select
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 class SimpleProxyServer:
-    def __init__(self, host='localhost', port=8888):
+    def __init__(self, host='localhost', port=8888, max_workers=64):
         self.host = host
         self.port = port
         self.running = False
         self.connections = 0
+        # Bounded worker pool instead of an unbounded thread per
+        # connection - reuses threads across tunnels and caps stack memory
+        self.max_workers = max_workers
+        self._pool = None
         
     def start(self):
         """Start the proxy server"""
@@ -27,6 +33,7 @@ class SimpleProxyServer:
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(10)
             self.running = True
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
             
             print(f"🔗 Simple Proxy Server started on {self.host}:{self.port}")
             print(f"📋 Configure your client to use: http://{self.host}:{self.port}")
@@ -39,13 +46,8 @@ class SimpleProxyServer:
                     self.connections += 1
                     print(f"📥 Connection #{self.connections} from {addr[0]}:{addr[1]}")
                     
-                    # Handle each connection in a separate thread
-                    client_thread = threading.Thread(
-                        target=self.handle_client,
-                        args=(client_socket, addr)
-                    )
-                    client_thread.daemon = True
-                    client_thread.start()
+                    # Hand each connection to the shared worker pool
+                    self._pool.submit(self.handle_client, client_socket, addr)
                     
                 except socket.error:
                     break
@@ -155,29 +157,63 @@ class SimpleProxyServer:
     def tunnel_data(self, client_socket, target_socket, addr):
         """Tunnel data between client and target for HTTPS"""
         try:
+            # On Linux, splice(2) moves tunnel bytes kernel-side without
+            # copying each chunk through Python; elsewhere (Windows) fall
+            # back to the recv/send copy loop
+            if hasattr(os, 'splice'):
+                try:
+                    self._tunnel_splice(client_socket, target_socket)
+                    return
+                except OSError:
+                    pass  # e.g. unsupported fd type - use the copy loop
+
             while True:
-                ready, _, _ = select.select([client_socket, target_socket], [], [], 1)
-                
+                # Block until either side is readable - a select timeout
+                # just burns a wakeup per second for idle tunnels
+                ready, _, _ = select.select([client_socket, target_socket], [], [])
+
                 if client_socket in ready:
-                    data = client_socket.recv(4096)
+                    data = client_socket.recv(65536)
                     if not data:
                         break
-                    target_socket.send(data)
-                    
+                    target_socket.sendall(data)
+
                 if target_socket in ready:
-                    data = target_socket.recv(4096)
+                    data = target_socket.recv(65536)
                     if not data:
                         break
-                    client_socket.send(data)
-                    
+                    client_socket.sendall(data)
+
         except Exception as e:
             print(f"⚠️  Tunnel error for {addr[0]}: {e}")
         finally:
             target_socket.close()
+
+    def _tunnel_splice(self, client_socket, target_socket):
+        """Tunnel via zero-copy splice(2) through a pipe per direction"""
+        pipes = {client_socket: os.pipe(), target_socket: os.pipe()}
+        peers = {client_socket: target_socket, target_socket: client_socket}
+        try:
+            while True:
+                ready, _, _ = select.select([client_socket, target_socket], [], [])
+                for sock in ready:
+                    read_fd, write_fd = pipes[sock]
+                    moved = os.splice(sock.fileno(), write_fd, 65536)
+                    if not moved:
+                        return
+                    while moved:
+                        moved -= os.splice(read_fd, peers[sock].fileno(), moved)
+        finally:
+            for read_fd, write_fd in pipes.values():
+                os.close(read_fd)
+                os.close(write_fd)
     
     def stop(self):
         """Stop the proxy server"""
         self.running = False
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
         if hasattr(self, 'server_socket'):
             self.server_socket.close()
         print(f"\n🛑 Proxy server stopped. Handled {self.connections} connections.")
@@ -6,8 +6,13 @@ Provides multiple solutions for enabling SSL verification with AtHoc
 
 import os
 import ssl
+import socket
+import hashlib
+import shutil
 import requests
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from urllib3.util.ssl_ import create_urllib3_context
 from requests.adapters import HTTPAdapter
@@ -19,25 +24,43 @@ try:
 except:
     pass
 
+@lru_cache(maxsize=128)
+def _get_ssl_context(disable_ssl_verify=False, cert_path=None, cert_mtime=None):
+    """Build (or reuse) an SSLContext for the given verification settings
+
+    load_verify_locations re-parses the whole CA bundle, which is the slow
+    part of adapter construction - adapters with identical settings share
+    one context. cert_mtime is part of the cache key so an updated bundle
+    file gets a fresh context.
+    """
+    context = create_urllib3_context(
+        ssl_minimum_version=ssl.TLSVersion.TLSv1_2
+    )
+
+    if disable_ssl_verify:
+        # Properly disable SSL verification
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif cert_path:
+        # Use custom certificate bundle
+        context.load_verify_locations(cafile=cert_path)
+
+    return context
+
 class FixedTLS12HttpAdapter(HTTPAdapter):
     """Fixed version of TLS12HttpAdapter with proper SSL configuration"""
     def __init__(self, disable_ssl_verify=False, cert_path=None, *args, **kwargs):
         self.disable_ssl_verify = disable_ssl_verify
         self.cert_path = cert_path
-        
-        # Create SSL context
-        self.ssl_context = create_urllib3_context(
-            ssl_minimum_version=ssl.TLSVersion.TLSv1_2
-        )
-        
-        if disable_ssl_verify:
-            # Properly disable SSL verification
-            self.ssl_context.check_hostname = False
-            self.ssl_context.verify_mode = ssl.CERT_NONE
-        elif cert_path and os.path.exists(cert_path):
-            # Use custom certificate bundle
-            self.ssl_context.load_verify_locations(cafile=cert_path)
-            
+
+        cert_mtime = None
+        if cert_path and os.path.exists(cert_path):
+            cert_mtime = os.path.getmtime(cert_path)
+        else:
+            cert_path = None
+
+        self.ssl_context = _get_ssl_context(disable_ssl_verify, cert_path, cert_mtime)
+
         super().__init__(*args, **kwargs)
 
     def init_poolmanager(self, *args, **kwargs):
@@ -49,174 +72,199 @@ class FixedTLS12HttpAdapter(HTTPAdapter):
         return super().proxy_manager_for(*args, **kwargs)
 
 def download_certificate_chain(hostname, port=443):
-    """Download the certificate chain for a hostname"""
+    """Download the certificate chain for a hostname
+
+    Talks TLS in-process instead of shelling out to `openssl s_client`
+    and scraping its output - no fork, no PEM text parsing, and it works
+    on boxes without the openssl CLI installed.
+    """
     print(f"📥 Downloading certificate chain for {hostname}...")
-    
+
     try:
-        import subprocess
-        result = subprocess.run([
-            'openssl', 's_client', 
-            '-connect', f'{hostname}:{port}',
-            '-servername', hostname,
-            '-showcerts'
-        ], capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            # Extract certificates from output
-            certs = []
-            lines = result.stdout.split('\n')
-            in_cert = False
-            current_cert = []
-            
-            for line in lines:
-                if '-----BEGIN CERTIFICATE-----' in line:
-                    in_cert = True
-                    current_cert = [line]
-                elif '-----END CERTIFICATE-----' in line and in_cert:
-                    current_cert.append(line)
-                    certs.append('\n'.join(current_cert))
-                    current_cert = []
-                    in_cert = False
-                elif in_cert:
-                    current_cert.append(line)
-            
-            return certs
-        else:
-            print(f"❌ Failed to download certificates: {result.stderr}")
-            return []
-            
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+        with socket.create_connection((hostname, port), timeout=10) as sock:
+            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+                try:
+                    # Python 3.10+: the full chain as presented by the server
+                    chain = ssock._sslobj.get_unverified_chain()
+                except AttributeError:
+                    chain = None
+
+                if chain:
+                    return [cert.public_bytes().strip() for cert in chain]
+
+                # Older Python: leaf certificate only
+                der_cert = ssock.getpeercert(binary_form=True)
+                if der_cert:
+                    return [ssl.DER_cert_to_PEM_cert(der_cert).strip()]
+
+                print("❌ Failed to download certificates: no certificate presented")
+                return []
+
     except Exception as e:
         print(f"❌ Error downloading certificates: {e}")
         return []
 
 def create_certificate_bundle(hostname, output_path):
-    """Create a certificate bundle with system CAs + server certs"""
+    """Create a certificate bundle with system CAs + server certs
+
+    A sidecar signature file records which hostname and certifi bundle
+    the output was built from; when they are unchanged, repeat runs skip
+    the certificate download and the bundle rewrite entirely.
+    """
     print(f"🔧 Creating certificate bundle for {hostname}...")
-    
+
     try:
         # Get system CA bundle
         import certifi
         system_ca_path = certifi.where()
-        
+
+        signature = hashlib.sha256(
+            f"{hostname}:{os.path.getmtime(system_ca_path)}".encode()
+        ).hexdigest()
+        sig_path = f"{output_path}.sig"
+
+        try:
+            with open(sig_path) as sig_file:
+                if sig_file.read().strip() == signature and os.path.exists(output_path):
+                    print(f"✅ Certificate bundle up to date: {output_path}")
+                    return True
+        except OSError:
+            pass  # No sidecar yet - build the bundle
+
         # Download server certificate chain
         server_certs = download_certificate_chain(hostname)
-        
+
         if not server_certs:
             print("❌ Could not download server certificates")
             return False
-        
+
         # Combine system CAs with server certificates
         with open(output_path, 'w') as f:
-            # Add system CAs
+            # Add system CAs (streamed - the CA bundle is a few hundred KB)
             with open(system_ca_path, 'r') as ca_file:
-                f.write(ca_file.read())
-            
+                shutil.copyfileobj(ca_file, f, 64 * 1024)
+
             # Add server certificate chain
             f.write('\n# Server certificate chain for {}\n'.format(hostname))
             for i, cert in enumerate(server_certs):
                 f.write(f'\n# Certificate {i+1}\n')
                 f.write(cert)
                 f.write('\n')
-        
+
+        with open(sig_path, 'w') as sig_file:
+            sig_file.write(signature)
+
         print(f"✅ Certificate bundle created: {output_path}")
         return True
-        
+
     except Exception as e:
         print(f"❌ Error creating certificate bundle: {e}")
         return False
 
+# One session shared by the solution probes below - remounting an adapter
+# swaps the SSL configuration while urllib3's pool keeps the connection to
+# the host alive between probes instead of paying DNS + TCP + TLS each time.
+# One persistent session per SSL configuration, so the probes below can
+# run concurrently and repeat runs reuse pooled connections. The
+# environment-bundle probe keeps its own vanilla session because it must
+# resolve its verify setting at request time like a bare requests.get.
+_session = requests.Session()
+_env_session = requests.Session()
+_insecure_session = requests.Session()
+_insecure_session.mount('https://', FixedTLS12HttpAdapter(disable_ssl_verify=True))
+_insecure_session.verify = False
+
 def test_ssl_solutions():
-    """Test different SSL verification solutions"""
+    """Test different SSL verification solutions
+
+    The three probes are independent HTTPS requests dominated by network
+    latency, so they run on a small thread pool and the wall time is
+    that of the slowest probe instead of the sum of all three.
+    """
     print("🧪 Testing SSL Verification Solutions")
     print("=" * 60)
-    
+
     athoc_url = os.getenv("ATHOC_SERVER_URL", "https://catcloud.athocdevo.com")
     hostname = athoc_url.replace('https://', '').split('/')[0]
-    
-    solutions = []
-    
-    # Solution 1: Custom certificate bundle
-    print("\n1️⃣ Testing: Custom Certificate Bundle")
+
+    # The bundle feeds probes 1 and 2, so build it before dispatching
     cert_bundle_path = Path(__file__).parent / f"{hostname}.pem"
-    
-    if create_certificate_bundle(hostname, cert_bundle_path):
+    bundle_ok = create_certificate_bundle(hostname, cert_bundle_path)
+
+    def probe_custom_bundle():
+        if not bundle_ok:
+            return None
+        result = {
+            'name': 'Custom Certificate Bundle',
+            'method': f'SSL_CERT_PATH={cert_bundle_path}'
+        }
         try:
-            session = requests.Session()
-            session.mount('https://', FixedTLS12HttpAdapter(cert_path=str(cert_bundle_path)))
-            response = session.get(athoc_url, timeout=10)
-            
-            print(f"   ✅ Custom certificate bundle works!")
-            print(f"   📊 Status: {response.status_code}")
-            solutions.append({
-                'name': 'Custom Certificate Bundle',
-                'method': f'SSL_CERT_PATH={cert_bundle_path}',
-                'works': True
-            })
-            
+            _session.mount('https://', FixedTLS12HttpAdapter(cert_path=str(cert_bundle_path)))
+            response = _session.get(athoc_url, timeout=10)
+            result.update({'works': True, 'status': response.status_code})
         except Exception as e:
-            print(f"   ❌ Custom certificate bundle failed: {e}")
-            solutions.append({
-                'name': 'Custom Certificate Bundle',
-                'method': f'SSL_CERT_PATH={cert_bundle_path}',
-                'works': False,
-                'error': str(e)
-            })
-    
-    # Solution 2: Environment variable CA bundle
-    print("\n2️⃣ Testing: Environment Variable CA Bundle")
-    try:
-        os.environ['REQUESTS_CA_BUNDLE'] = str(cert_bundle_path)
-        session = requests.Session()
-        response = session.get(athoc_url, timeout=10)
-        
-        print(f"   ✅ Environment CA bundle works!")
-        print(f"   📊 Status: {response.status_code}")
-        solutions.append({
-            'name': 'Environment CA Bundle',
-            'method': f'export REQUESTS_CA_BUNDLE={cert_bundle_path}',
-            'works': True
-        })
-        
-    except Exception as e:
-        print(f"   ❌ Environment CA bundle failed: {e}")
-        solutions.append({
+            result.update({'works': False, 'error': str(e)})
+        return result
+
+    def probe_env_bundle():
+        result = {
             'name': 'Environment CA Bundle',
-            'method': f'export REQUESTS_CA_BUNDLE={cert_bundle_path}',
-            'works': False,
-            'error': str(e)
-        })
-    finally:
-        if 'REQUESTS_CA_BUNDLE' in os.environ:
-            del os.environ['REQUESTS_CA_BUNDLE']
-    
-    # Solution 3: Disabled SSL verification (current working solution)
-    print("\n3️⃣ Testing: Disabled SSL Verification (Current)")
-    try:
-        session = requests.Session()
-        session.mount('https://', FixedTLS12HttpAdapter(disable_ssl_verify=True))
-        session.verify = False
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        
-        response = session.get(athoc_url, timeout=10)
-        print(f"   ✅ Disabled SSL verification works!")
-        print(f"   📊 Status: {response.status_code}")
-        solutions.append({
-            'name': 'Disabled SSL Verification',
-            'method': 'DISABLE_SSL_VERIFY=true',
-            'works': True,
-            'note': 'Less secure but functional'
-        })
-        
-    except Exception as e:
-        print(f"   ❌ Even disabled SSL failed: {e}")
-        solutions.append({
+            'method': f'export REQUESTS_CA_BUNDLE={cert_bundle_path}'
+        }
+        try:
+            # verify= is exactly what REQUESTS_CA_BUNDLE resolves to; passing
+            # it directly keeps this worker thread from mutating global env
+            # under the other probes
+            response = _env_session.get(athoc_url, timeout=10, verify=str(cert_bundle_path))
+            result.update({'works': True, 'status': response.status_code})
+        except Exception as e:
+            result.update({'works': False, 'error': str(e)})
+        return result
+
+    def probe_disabled_ssl():
+        result = {
             'name': 'Disabled SSL Verification',
-            'method': 'DISABLE_SSL_VERIFY=true',
-            'works': False,
-            'error': str(e)
-        })
-    
+            'method': 'DISABLE_SSL_VERIFY=true'
+        }
+        try:
+            import urllib3
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+            response = _insecure_session.get(athoc_url, timeout=10)
+            result.update({'works': True, 'status': response.status_code,
+                           'note': 'Less secure but functional'})
+        except Exception as e:
+            result.update({'works': False, 'error': str(e)})
+        return result
+
+    probes = [
+        ('1️⃣ Testing: Custom Certificate Bundle', 'Custom certificate bundle', probe_custom_bundle),
+        ('2️⃣ Testing: Environment Variable CA Bundle', 'Environment CA bundle', probe_env_bundle),
+        ('3️⃣ Testing: Disabled SSL Verification (Current)', 'Disabled SSL verification', probe_disabled_ssl),
+    ]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(probe) for _, _, probe in probes]
+        outcomes = [future.result() for future in futures]
+
+    # Report in the original order once all probes are back
+    solutions = []
+    for (header, label, _), result in zip(probes, outcomes):
+        print(f"\n{header}")
+        if result is None:
+            continue  # bundle creation failed - probe skipped
+        status = result.pop('status', None)
+        if result['works']:
+            print(f"   ✅ {label} works!")
+            print(f"   📊 Status: {status}")
+        else:
+            print(f"   ❌ {label} failed: {result['error']}")
+        solutions.append(result)
+
     return solutions
 
 def generate_implementation_guide(solutions):
@@ -269,12 +317,18 @@ def main():
     print(f"   DISABLE_SSL_VERIFY: {disable_ssl}")
     print(f"   SSL_CERT_PATH: {os.getenv('SSL_CERT_PATH', 'Not set')}")
     
-    # Run tests
-    solutions = test_ssl_solutions()
-    
-    # Generate guide
-    generate_implementation_guide(solutions)
-    
+    try:
+        # Run tests
+        solutions = test_ssl_solutions()
+
+        # Generate guide
+        generate_implementation_guide(solutions)
+    finally:
+        # Close the shared sessions exactly once
+        _session.close()
+        _env_session.close()
+        _insecure_session.close()
+
     print(f"\n" + "=" * 80)
     print("🏁 SSL Fix Guide Complete")
     print("=" * 80)
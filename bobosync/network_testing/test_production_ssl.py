@@ -9,6 +9,7 @@ import ssl
 import socket
 import requests
 import urllib3
+from functools import lru_cache
 from urllib3.util.ssl_ import create_urllib3_context
 from requests.adapters import HTTPAdapter
 from pathlib import Path
@@ -20,17 +21,26 @@ try:
 except:
     pass
 
+@lru_cache(maxsize=4)
+def _get_ssl_context(disable_ssl_verify=False):
+    """Build (or reuse) an SSLContext - the tests below construct several
+    adapters with the same two settings, and context setup is the slow
+    part of each construction"""
+    context = create_urllib3_context(
+        ssl_minimum_version=ssl.TLSVersion.TLSv1_2
+    )
+
+    if disable_ssl_verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    return context
+
 class ProductionTLS12HttpAdapter(HTTPAdapter):
     """TLS adapter specifically for production testing"""
     def __init__(self, disable_ssl_verify=False, *args, **kwargs):
-        self.ssl_context = create_urllib3_context(
-            ssl_minimum_version=ssl.TLSVersion.TLSv1_2
-        )
-        
-        if disable_ssl_verify:
-            self.ssl_context.check_hostname = False
-            self.ssl_context.verify_mode = ssl.CERT_NONE
-            
+        self.ssl_context = _get_ssl_context(disable_ssl_verify)
+
         super().__init__(*args, **kwargs)
 
     def init_poolmanager(self, *args, **kwargs):
@@ -56,13 +66,23 @@ def test_production_ssl_verification():
     # Test 1: SSL Verification ENABLED (what customers need)
     print("1️⃣ Testing SSL Verification ENABLED (Production Mode)")
     print("-" * 50)
+    tls_info = {}
     try:
         session = requests.Session()
         adapter = ProductionTLS12HttpAdapter(disable_ssl_verify=False)
         session.mount('https://', adapter)
         session.verify = True  # Enable SSL verification
-        
-        response = session.get(production_url, timeout=15)
+
+        response = session.get(production_url, timeout=15, stream=True)
+        # Grab the peer certificate off the live connection so test 3
+        # doesn't have to pay for a second TLS handshake
+        try:
+            sock = response.raw.connection.sock
+            tls_info['cert'] = sock.getpeercert()
+            tls_info['version'] = sock.version()
+        except Exception:
+            pass
+        response.close()
         print(f"   ✅ SSL Verification WORKS for production system!")
         print(f"   📊 Status Code: {response.status_code}")
         print(f"   🔒 SSL verification successful - customers can use DISABLE_SSL_VERIFY=false")
@@ -104,34 +124,43 @@ def test_production_ssl_verification():
     print("3️⃣ Certificate Chain Analysis")
     print("-" * 50)
     try:
-        # Use a more permissive context for analysis
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
-        
-        with socket.create_connection((hostname, 443), timeout=10) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                cert = ssock.getpeercert()
-                
-                print(f"   📋 Certificate Subject: {cert.get('subject')}")
-                print(f"   📋 Certificate Issuer: {cert.get('issuer')}")
-                print(f"   📅 Valid From: {cert.get('notBefore')}")
-                print(f"   📅 Valid Until: {cert.get('notAfter')}")
-                print(f"   🔐 SSL Version: {ssock.version()}")
-                
-                # Check Subject Alternative Names
-                san_list = []
-                for field in cert.get('subjectAltName', []):
-                    if field[0] == 'DNS':
-                        san_list.append(field[1])
-                
-                if san_list:
-                    print(f"   🌐 Subject Alternative Names: {', '.join(san_list)}")
-                    
-                # Check if hostname matches
-                matches_hostname = any(hostname in san for san in san_list) or hostname in str(cert.get('subject', ''))
-                print(f"   🎯 Hostname Match: {'✅ Yes' if matches_hostname else '❌ No'}")
-                
+        cert = tls_info.get('cert')
+        ssl_version = tls_info.get('version')
+
+        if cert:
+            # The verified connection from test 1 already handed us the
+            # parsed certificate - no extra handshake needed
+            print("   ♻️  Reusing certificate captured during test 1")
+        else:
+            # Fall back to a dedicated probe with a permissive context
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+
+            with socket.create_connection((hostname, 443), timeout=10) as sock:
+                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+                    cert = ssock.getpeercert()
+                    ssl_version = ssock.version()
+
+        print(f"   📋 Certificate Subject: {cert.get('subject')}")
+        print(f"   📋 Certificate Issuer: {cert.get('issuer')}")
+        print(f"   📅 Valid From: {cert.get('notBefore')}")
+        print(f"   📅 Valid Until: {cert.get('notAfter')}")
+        print(f"   🔐 SSL Version: {ssl_version}")
+
+        # Check Subject Alternative Names
+        san_list = []
+        for field in cert.get('subjectAltName', []):
+            if field[0] == 'DNS':
+                san_list.append(field[1])
+
+        if san_list:
+            print(f"   🌐 Subject Alternative Names: {', '.join(san_list)}")
+
+        # Check if hostname matches
+        matches_hostname = any(hostname in san for san in san_list) or hostname in str(cert.get('subject', ''))
+        print(f"   🎯 Hostname Match: {'✅ Yes' if matches_hostname else '❌ No'}")
+
     except Exception as e:
         print(f"   ❌ Certificate analysis failed: {e}")
     